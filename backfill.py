@@ -0,0 +1,80 @@
+"""One-shot backfill of derived fields on existing employee documents.
+
+Populates E_Name_normalized (indexed forgot-password lookup) and the GeoJSON
+location (nearby-employee queries). Run once after deploying either:
+
+    python backfill.py
+"""
+import asyncio
+from pymongo import UpdateOne
+from database import collection, ensure_indexes
+from utils import normalize_name, build_location
+
+BATCH_SIZE = 1000
+
+
+async def backfill_normalized_names() -> int:
+    """Populate E_Name_normalized wherever it is missing and return the number of documents updated."""
+    updated = 0
+    operations = []
+    cursor = collection.find(
+        {"E_Name_normalized": {"$exists": False}, "E_Name": {"$type": "string"}},
+        {"E_Name": 1}
+    )
+    async for employee in cursor:
+        operations.append(UpdateOne(
+            {"_id": employee["_id"]},
+            {"$set": {"E_Name_normalized": normalize_name(employee["E_Name"])}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+
+    if operations:
+        result = await collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    await ensure_indexes()
+    return updated
+
+
+async def backfill_locations() -> int:
+    """Populate location from latitude/longitude wherever it is missing and return the number of documents updated."""
+    updated = 0
+    operations = []
+    cursor = collection.find(
+        {
+            "location": {"$exists": False},
+            "latitude": {"$gte": -90, "$lte": 90},
+            "longitude": {"$gte": -180, "$lte": 180}
+        },
+        {"latitude": 1, "longitude": 1}
+    )
+    async for employee in cursor:
+        operations.append(UpdateOne(
+            {"_id": employee["_id"]},
+            {"$set": {"location": build_location(employee["latitude"], employee["longitude"])}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+
+    if operations:
+        result = await collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    await ensure_indexes()
+    return updated
+
+
+async def main():
+    names = await backfill_normalized_names()
+    print(f"Backfilled E_Name_normalized on {names} employee documents")
+    locations = await backfill_locations()
+    print(f"Backfilled location on {locations} employee documents")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,363 @@
+"""In-process, Motor-compatible stand-in for the parts of MongoDB this app uses.
+
+Hash indexes on the first key of each created index keep equality and $in
+lookups cheap, so CSV benchmarks stay dominated by app work rather than
+linear scans. Use a local mongod for numbers comparable with production.
+"""
+import math
+import asyncio
+from types import SimpleNamespace
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+
+# Radius MongoDB uses for spherical $geoNear distances
+_EARTH_RADIUS_METRES = 6378100
+
+
+def _type_matches(value, type_name) -> bool:
+    types = {"string": str, "int": int, "double": float, "object": dict, "array": list, "bool": bool}
+    return isinstance(value, types[type_name])
+
+
+def _compare(value, operator, operand) -> bool:
+    if operator == "$in":
+        return value is not _MISSING and value in operand
+    if operator == "$nin":
+        return value is _MISSING or value not in operand
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if operator == "$ne":
+        return value is _MISSING or value != operand
+    if operator == "$type":
+        return value is not _MISSING and _type_matches(value, operand)
+    if value is _MISSING or value is None:
+        return False
+    if operator == "$gt":
+        return value > operand
+    if operator == "$gte":
+        return value >= operand
+    if operator == "$lt":
+        return value < operand
+    if operator == "$lte":
+        return value <= operand
+    raise NotImplementedError(f"Query operator {operator} is not supported by the fake")
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, clause) for clause in condition):
+                return False
+            continue
+        value = doc.get(field, _MISSING)
+        if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+            if not all(_compare(value, operator, operand) for operator, operand in condition.items()):
+                return False
+        elif condition is None:
+            # As in MongoDB, null matches both null and a missing field
+            if value is not _MISSING and value is not None:
+                return False
+        elif value is _MISSING or value != condition:
+            return False
+    return True
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return dict(doc)
+    included = {field for field, flag in projection.items() if flag and field != "_id"}
+    excluded = {field for field, flag in projection.items() if not flag}
+    if included:
+        result = {field: doc[field] for field in included if field in doc}
+        if "_id" not in excluded:
+            result["_id"] = doc["_id"]
+        return result
+    return {field: value for field, value in doc.items() if field not in excluded}
+
+
+def _sort_docs(docs: list, keys) -> None:
+    for field, direction in reversed(keys):
+        docs.sort(key=lambda doc: (doc.get(field) is None, doc.get(field)), reverse=direction < 0)
+
+
+def _geo_distance(point: dict, location) -> float:
+    # Haversine distance in metres between two GeoJSON points
+    if not isinstance(location, dict) or location.get("type") != "Point":
+        return None
+    (lon1, lat1), (lon2, lat2) = point["coordinates"], location["coordinates"]
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * _EARTH_RADIUS_METRES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _geo_near(docs: list, options: dict) -> list:
+    # A linear scan rather than a 2dsphere index, so cost grows with the collection
+    results = []
+    for doc in docs:
+        if not _matches(doc, options.get("query", {})):
+            continue
+        distance = _geo_distance(options["near"], doc.get(options.get("key", "location")))
+        if distance is None or distance < options.get("minDistance", 0):
+            continue
+        if options.get("maxDistance") is not None and distance > options["maxDistance"]:
+            continue
+        results.append({**doc, options["distanceField"]: distance})
+    results.sort(key=lambda doc: doc[options["distanceField"]])
+    return results
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool) -> None:
+    for operator, fields in update.items():
+        if operator == "$set" or (operator == "$setOnInsert" and inserting):
+            doc.update(fields)
+        elif operator == "$inc":
+            for field, amount in fields.items():
+                doc[field] = doc.get(field, 0) + amount
+        elif operator == "$unset":
+            for field in fields:
+                doc.pop(field, None)
+        elif operator != "$setOnInsert":
+            raise NotImplementedError(f"Update operator {operator} is not supported by the fake")
+
+
+class FakeCursor:
+    def __init__(self, docs: list, projection=None):
+        self._docs = docs
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        _sort_docs(self._docs, key if isinstance(key, list) else [(key, direction)])
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> list:
+        docs = self._docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self._projection) for doc in docs]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+    async def to_list(self, length=None):
+        results = self._results()
+        return results if length is None else results[:length]
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._docs = {}
+        self._indexes = {}  # field -> {value: set of _id}
+        self._unique = set()
+
+    # Indexes
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        field = keys[0][0]
+        if field not in self._indexes:
+            index = {}
+            for doc_id, doc in self._docs.items():
+                if field in doc:
+                    index.setdefault(self._index_key(doc[field]), set()).add(doc_id)
+            self._indexes[field] = index
+        if unique:
+            self._unique.add(field)
+        return "_".join(f"{name}_{kind}" for name, kind in keys)
+
+    @staticmethod
+    def _index_key(value):
+        return value if not isinstance(value, (dict, list)) else repr(value)
+
+    def _index_add(self, doc: dict) -> None:
+        for field, index in self._indexes.items():
+            if field in doc:
+                index.setdefault(self._index_key(doc[field]), set()).add(doc["_id"])
+
+    def _index_remove(self, doc: dict) -> None:
+        for field, index in self._indexes.items():
+            if field in doc:
+                index.get(self._index_key(doc[field]), set()).discard(doc["_id"])
+
+    def _check_unique(self, doc: dict, ignore_id=None) -> None:
+        for field in self._unique:
+            if field in doc:
+                holders = self._indexes[field].get(self._index_key(doc[field]), set()) - {ignore_id}
+                if holders:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {field}_1", 11000)
+
+    def _candidates(self, query: dict):
+        # Narrow with a hash index on an equality or $in condition when one exists
+        for field, condition in query.items():
+            if field not in self._indexes:
+                continue
+            index = self._indexes[field]
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                ids = set()
+                for value in condition["$in"]:
+                    ids |= index.get(self._index_key(value), set())
+                return [self._docs[doc_id] for doc_id in sorted(ids, key=str)]
+            # null also matches documents without the field, which the index does not hold
+            if not isinstance(condition, dict) and condition is not None:
+                return [self._docs[doc_id] for doc_id in index.get(self._index_key(condition), set())]
+        return list(self._docs.values())
+
+    def _find(self, query) -> list:
+        query = query or {}
+        return [doc for doc in self._candidates(query) if _matches(doc, query)]
+
+    # Reads
+
+    def find(self, filter=None, projection=None):
+        return FakeCursor(self._find(filter), projection)
+
+    async def find_one(self, filter=None, projection=None):
+        docs = self._find(filter)
+        return _project(docs[0], projection) if docs else None
+
+    async def count_documents(self, filter):
+        return len(self._find(filter))
+
+    def aggregate(self, pipeline):
+        docs = list(self._docs.values())
+        for stage in pipeline:
+            (operator, argument), = stage.items()
+            if operator == "$geoNear":
+                docs = _geo_near(docs, argument)
+            elif operator == "$match":
+                docs = [doc for doc in docs if _matches(doc, argument)]
+            elif operator == "$sort":
+                _sort_docs(docs, list(argument.items()))
+            elif operator == "$limit":
+                docs = docs[:argument]
+            elif operator == "$project":
+                docs = [_project(doc, argument) for doc in docs]
+            else:
+                raise NotImplementedError(f"Pipeline stage {operator} is not supported by the fake")
+        return FakeCursor(docs)
+
+    # Writes
+
+    def _insert(self, doc: dict):
+        doc = dict(doc)
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_", 11000)
+        self._check_unique(doc)
+        self._docs[doc["_id"]] = doc
+        self._index_add(doc)
+        return doc["_id"]
+
+    def _update(self, query: dict, update: dict, upsert: bool) -> tuple:
+        docs = self._find(query)
+        if docs:
+            doc = docs[0]
+            updated = dict(doc)
+            _apply_update(updated, update, inserting=False)
+            self._check_unique(updated, ignore_id=doc["_id"])
+            self._index_remove(doc)
+            self._docs[doc["_id"]] = updated
+            self._index_add(updated)
+            return 1, None
+        if upsert:
+            doc = {field: value for field, value in query.items() if not isinstance(value, dict)}
+            _apply_update(doc, update, inserting=True)
+            return 0, self._insert(doc)
+        return 0, None
+
+    async def insert_one(self, document):
+        await asyncio.sleep(0)
+        return SimpleNamespace(inserted_id=self._insert(document))
+
+    async def insert_many(self, documents, ordered=True):
+        await asyncio.sleep(0)
+        return await self.bulk_write([InsertOne(doc) for doc in documents], ordered=ordered)
+
+    async def update_one(self, filter, update, upsert=False):
+        await asyncio.sleep(0)
+        modified, upserted_id = self._update(filter, update, upsert)
+        return SimpleNamespace(matched_count=modified, modified_count=modified, upserted_id=upserted_id)
+
+    async def find_one_and_update(self, filter, update, projection=None, upsert=False, return_document=ReturnDocument.BEFORE):
+        await asyncio.sleep(0)
+        docs = self._find(filter)
+        if not docs:
+            if not upsert:
+                return None
+            _, doc_id = self._update(filter, update, upsert=True)
+            return _project(self._docs[doc_id], projection) if return_document == ReturnDocument.AFTER else None
+        before = docs[0]
+        self._update({"_id": before["_id"]}, update, upsert=False)
+        return _project(self._docs[before["_id"]] if return_document == ReturnDocument.AFTER else before, projection)
+
+    async def delete_many(self, filter):
+        await asyncio.sleep(0)
+        docs = self._find(filter)
+        for doc in docs:
+            self._index_remove(doc)
+            del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(docs))
+
+    async def bulk_write(self, requests, ordered=True):
+        await asyncio.sleep(0)
+        inserted_ids = []
+        modified = 0
+        upserted_ids = {}
+        write_errors = []
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    inserted_ids.append(self._insert(request._doc))
+                elif isinstance(request, UpdateOne):
+                    count, upserted_id = self._update(request._filter, request._doc, request._upsert)
+                    modified += count
+                    if upserted_id is not None:
+                        upserted_ids[index] = upserted_id
+                else:
+                    raise NotImplementedError(f"{type(request).__name__} is not supported by the fake")
+            except DuplicateKeyError as e:
+                write_errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if write_errors:
+            raise BulkWriteError({
+                "writeErrors": write_errors,
+                "nInserted": len(inserted_ids),
+                "nModified": modified,
+                "upserted": [{"index": index, "_id": doc_id} for index, doc_id in upserted_ids.items()],
+            })
+        return SimpleNamespace(
+            inserted_ids=inserted_ids, modified_count=modified, upserted_count=len(upserted_ids), upserted_ids=upserted_ids
+        )
+
+
+class FakeDatabase:
+    def __init__(self, name: str = "recoverEase"):
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    async def command(self, command, **kwargs):
+        return {"ok": 1.0}
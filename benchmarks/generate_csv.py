@@ -0,0 +1,88 @@
+"""Generate synthetic employee CSVs for the /upload-csv benchmarks.
+
+    python benchmarks/generate_csv.py --rows 100000 --duplicate-rate 0.01 --invalid-rate 0.02 --out employees.csv
+"""
+import csv
+import random
+import argparse
+
+COLUMNS = [
+    "E_ID", "E_Name", "email", "address1", "address2",
+    "role", "mobile", "altMobile", "latitude",
+    "longitude", "physicalAddress", "userStatus"
+]
+
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "John", "Priya", "Arjun", "Sara", "Kiran", "Lena", "Omar"]
+LAST_NAMES = ["Rao", "Sharma", "Iyer", "Smith", "Khan", "Das", "Patel", "Nair", "Lopez", "Chen"]
+ROLES = ["field", "office", "manager", "dispatcher"]
+STATUSES = ["active", "inactive"]
+
+
+def _valid_row(rng: random.Random, e_id: int) -> dict:
+    first = rng.choice(FIRST_NAMES)
+    return {
+        "E_ID": e_id,
+        "E_Name": f"{first} {rng.choice(LAST_NAMES)}",
+        "email": f"{first.lower()}.{e_id}@example.com",
+        "address1": f"{rng.randint(1, 999)} Main Street",
+        "address2": f"Block {rng.randint(1, 50)}",
+        "role": rng.choice(ROLES),
+        "mobile": rng.randint(7000000000, 9999999999),
+        "altMobile": rng.randint(7000000000, 9999999999),
+        "latitude": round(rng.uniform(8, 35), 6),
+        "longitude": round(rng.uniform(68, 97), 6),
+        "physicalAddress": f"{rng.randint(1, 999)} Main Street, Block {rng.randint(1, 50)}",
+        "userStatus": rng.choice(STATUSES),
+    }
+
+
+def _invalidate(rng: random.Random, row: dict) -> dict:
+    # One of the mistakes seen in real HR exports
+    field, value = rng.choice([
+        ("email", "not-an-email"),
+        ("latitude", "123.5"),
+        ("mobile", "n/a"),
+        ("E_Name", ""),
+    ])
+    row[field] = value
+    return row
+
+
+def generate_rows(rows: int, duplicate_rate: float = 0.0, invalid_rate: float = 0.0, seed: int = 42):
+    """Yield CSV row dicts, re-emitting earlier E_IDs and corrupting fields at the given rates."""
+    rng = random.Random(seed)
+    emitted = []
+    for i in range(rows):
+        if emitted and rng.random() < duplicate_rate:
+            row = dict(rng.choice(emitted))
+        else:
+            row = _valid_row(rng, i + 1)
+            if len(emitted) < 10_000:
+                emitted.append(row)
+        if rng.random() < invalid_rate:
+            row = _invalidate(rng, dict(row))
+        yield row
+
+
+def write_csv(path: str, rows: int, duplicate_rate: float = 0.0, invalid_rate: float = 0.0, seed: int = 42) -> None:
+    """Write a synthetic employee CSV to path."""
+    with open(path, "w", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(generate_rows(rows, duplicate_rate, invalid_rate, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="rows to generate, e.g. 1000, 100000, 1000000")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="fraction of rows repeating an earlier E_ID")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="fraction of rows with an invalid field")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="employees.csv")
+    args = parser.parse_args()
+    write_csv(args.out, args.rows, args.duplicate_rate, args.invalid_rate, args.seed)
+    print(f"Wrote {args.rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Run the service benchmark scenarios in-process and write the results as JSON.
+
+    python benchmarks/run.py --rows 100000 --out results.json
+    python benchmarks/run.py --mongo-uri mongodb://localhost:27017 --scenarios upload_csv
+
+Without --mongo-uri the app runs against the in-process fake in fake_mongo.py,
+whose documents then count towards the memory measured for upload_csv.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ("add_employee", "upload_csv", "forgot_password", "nearby_employees")
+
+# E_ID ranges kept apart so scenarios never collide with each other or the CSV
+ADD_EMPLOYEE_FIRST_ID = 10_000_000
+FORGOT_PASSWORD_FIRST_ID = 20_000_000
+NEARBY_FIRST_ID = 30_000_000
+
+# nearby_employees seeds employees within roughly NEARBY_SPREAD degrees of this point
+NEARBY_CENTER = (12.97, 77.59)
+NEARBY_SPREAD = 0.05
+NEARBY_RADIUS_METRES = 5000
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _rss_mb() -> float:
+    # Current resident set size; /proc is Linux-only, so elsewhere this is unavailable
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RssSampler:
+    """Sample this process's RSS on a background thread while a scenario runs.
+
+    ru_maxrss is a high-water mark for the whole process, so it also counts
+    imports, the fake database and every earlier scenario. The baseline taken
+    on entry lets a scenario report only the memory it added. Bcrypt runs in
+    the hash pool's worker processes and is not included.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.baseline_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            current = _rss_mb()
+            if current is not None:
+                self.peak_mb = max(self.peak_mb or 0, current)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self.baseline_mb = _rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def results(self) -> dict:
+        if self.baseline_mb is None:
+            return {"peak_rss_mb": None, "rss_growth_mb": None}
+        return {"peak_rss_mb": self.peak_mb, "rss_growth_mb": self.peak_mb - self.baseline_mb}
+
+
+def _employee_payload(e_id: int) -> dict:
+    return {
+        "E_ID": e_id,
+        "E_Name": f"Bench{e_id} User",
+        "email": f"bench{e_id}@example.com",
+        "address1": "1 Main Street",
+        "address2": "Block 1",
+        "role": "field",
+        "mobile": 9000000000,
+        "altMobile": 8000000000,
+        "latitude": 12.97,
+        "longitude": 77.59,
+        "physicalAddress": "1 Main Street, Block 1",
+        "userStatus": "active",
+    }
+
+
+async def _run_concurrent(concurrency: int, payloads: list, send) -> dict:
+    """Send every payload with at most `concurrency` requests in flight and summarise latency."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(payload):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send(payload)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": len(payloads) / elapsed if elapsed else None,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+async def bench_add_employee(client, concurrency_levels: list, requests: int) -> list:
+    results = []
+    next_id = ADD_EMPLOYEE_FIRST_ID
+    for concurrency in concurrency_levels:
+        payloads = [_employee_payload(e_id) for e_id in range(next_id, next_id + requests)]
+        next_id += requests
+        results.append(await _run_concurrent(
+            concurrency, payloads, lambda payload: client.post("/add-employee", json=payload)
+        ))
+    return results
+
+
+async def bench_upload_csv(client, path: str, rows: int, endpoint: str) -> dict:
+    with open(path, "rb") as csv_file:
+        contents = csv_file.read()
+
+    files = {"file": ("bench.csv", contents, "text/csv")}
+    succeeded = failed = 0
+    with RssSampler() as memory:
+        started = time.perf_counter()
+        if endpoint == "/upload-csv/stream":
+            async with client.stream("POST", endpoint, files=files) as response:
+                async for line in response.aiter_lines():
+                    if line:
+                        status = json.loads(line)["status"]
+                        succeeded += status == "success"
+                        failed += status != "success"
+            status_code = response.status_code
+        else:
+            response = await client.post(endpoint, files=files)
+            body = response.json()
+            succeeded = len(body.get("employee_summaries", []))
+            failed = len(body.get("failed_rows", []))
+            status_code = response.status_code
+        elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": endpoint,
+        "status_code": status_code,
+        "rows": rows,
+        "succeeded": succeeded,
+        "failed": failed,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else None,
+        **memory.results(),
+    }
+
+
+async def bench_forgot_password(client, concurrency_levels: list, requests: int) -> list:
+    # Seed the employees whose passwords get reset
+    seeds = [_employee_payload(e_id) for e_id in range(FORGOT_PASSWORD_FIRST_ID, FORGOT_PASSWORD_FIRST_ID + requests)]
+    await _run_concurrent(max(concurrency_levels), seeds, lambda payload: client.post("/add-employee", json=payload))
+
+    resets = [{"E_Name": seed["E_Name"], "E_ID": seed["E_ID"]} for seed in seeds]
+    results = []
+    for concurrency in concurrency_levels:
+        results.append(await _run_concurrent(
+            concurrency, resets, lambda payload: client.post("/forgot-password", json=payload)
+        ))
+    return results
+
+
+async def bench_nearby_employees(client, concurrency_levels: list, requests: int) -> list:
+    # Seed employees scattered around one point, then page through them
+    rng = random.Random(0)
+    latitude, longitude = NEARBY_CENTER
+    seeds = []
+    for e_id in range(NEARBY_FIRST_ID, NEARBY_FIRST_ID + requests):
+        seed = _employee_payload(e_id)
+        seed["latitude"] = latitude + rng.uniform(-NEARBY_SPREAD, NEARBY_SPREAD)
+        seed["longitude"] = longitude + rng.uniform(-NEARBY_SPREAD, NEARBY_SPREAD)
+        seeds.append(seed)
+    await _run_concurrent(max(concurrency_levels), seeds, lambda payload: client.post("/add-employee", json=payload))
+
+    params = {"latitude": latitude, "longitude": longitude, "radius": NEARBY_RADIUS_METRES, "limit": 20}
+    first_page = await client.get("/employees/nearby", params=params)
+    next_cursor = first_page.json().get("next_cursor")
+    # Alternate first pages with cursor-resumed second pages
+    second_page = {**params, "cursor": next_cursor} if next_cursor else params
+    queries = [params if index % 2 == 0 else second_page for index in range(requests)]
+
+    results = []
+    for concurrency in concurrency_levels:
+        results.append(await _run_concurrent(
+            concurrency, queries, lambda query: client.get("/employees/nearby", params=query)
+        ))
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+async def run(args) -> dict:
+    # Read by the app modules at import time, so set before importing them
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+    import database
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_uri)
+        await client.drop_database(args.db_name)
+        database.set_database(client[args.db_name])
+    else:
+        from benchmarks.fake_mongo import FakeDatabase
+        database.set_database(FakeDatabase(args.db_name))
+
+    import httpx
+    import hashing
+    from main import app
+    from benchmarks.generate_csv import write_csv
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    scenarios = args.scenarios.split(",")
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": "mongod" if args.mongo_uri else "fake",
+            "bcrypt_rounds": hashing.BCRYPT_ROUNDS,
+            "hash_workers": hashing.HASH_WORKERS,
+            "rows": args.rows,
+            "duplicate_rate": args.duplicate_rate,
+            "invalid_rate": args.invalid_rate,
+        },
+        "scenarios": {},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            if "add_employee" in scenarios:
+                results["scenarios"]["add_employee"] = await bench_add_employee(client, concurrency_levels, args.requests)
+
+            if "upload_csv" in scenarios:
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, "bench.csv")
+                    write_csv(path, args.rows, args.duplicate_rate, args.invalid_rate)
+                    results["scenarios"]["upload_csv"] = await bench_upload_csv(client, path, args.rows, args.upload_endpoint)
+
+            if "forgot_password" in scenarios:
+                results["scenarios"]["forgot_password"] = await bench_forgot_password(client, concurrency_levels, args.requests)
+
+            if "nearby_employees" in scenarios:
+                results["scenarios"]["nearby_employees"] = await bench_nearby_employees(client, concurrency_levels, args.requests)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", help="local mongod to benchmark against; defaults to the in-process fake")
+    parser.add_argument("--db-name", default="recoverEase_benchmark", help="database to use, dropped before the run")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--rows", type=int, default=1000, help="CSV rows for upload_csv, e.g. 1000, 100000, 1000000")
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    parser.add_argument("--invalid-rate", type=float, default=0.01)
+    parser.add_argument("--upload-endpoint", default="/upload-csv", choices=["/upload-csv", "/upload-csv/stream"])
+    parser.add_argument("--concurrency", default="1,8,32,64", help="comma-separated concurrency sweep")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--bcrypt-rounds", type=int, help="override BCRYPT_ROUNDS for the run")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.out, "w") as out:
+        json.dump(results, out, indent=2)
+    print(json.dumps(results["scenarios"], indent=2))
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
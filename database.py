@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from metrics import mongo_event_listeners
 
 # Load environment variables from .env file
 load_dotenv()
@@ -8,22 +9,84 @@ load_dotenv()
 # Get Mongo URI from .env
 mongo_uri = os.getenv("MONGO_URI")
 
-# Validate URI
-if not mongo_uri:
-    raise ValueError("MONGO_URI not found in .env file")
+# Use your actual DB name below
+DB_NAME = "recoverEase"
 
-# Try connecting to MongoDB
-try:
-    # Connect to MongoDB
-    client = AsyncIOMotorClient(mongo_uri)
+# Import job results hold generated plaintext passwords, so they expire after this long
+IMPORT_RESULT_RETENTION_SECONDS = int(os.getenv("IMPORT_RESULT_RETENTION_SECONDS", str(24 * 60 * 60)))
 
-    # Use your actual DB and collection names below
-    db = client["recoverEase"]
-    collection = db["testUsers"]
+_db = None
 
-    # Check MongoDB server info to confirm connection
-    client.server_info()  # Will throw an exception if connection fails
-    print("MongoDB connection successful!")
 
-except Exception as e:
-    print(f"Failed to connect to MongoDB: {e}")
+def set_database(database) -> None:
+    """Use the given Motor-compatible database instead of connecting to MONGO_URI.
+
+    Lets benchmarks and local runs point the app at a local mongod or an
+    in-process fake without a .env file.
+    """
+    global _db
+    _db = database
+
+
+def get_database():
+    """Return the active database, connecting to MONGO_URI on first use."""
+    global _db
+    if _db is None:
+        # Validate URI
+        if not mongo_uri:
+            raise ValueError("MONGO_URI not found in .env file")
+        # Driver listeners feed command latency and pool wait time into /metrics
+        client = AsyncIOMotorClient(mongo_uri, event_listeners=mongo_event_listeners())
+        _db = client[DB_NAME]
+    return _db
+
+
+class _Collection:
+    """Resolves a named collection on the active database at call time."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_database()[self.name], attr)
+
+
+collection = _Collection("testUsers")
+jobs_collection = _Collection("importJobs")
+job_results_collection = _Collection("importJobResults")
+
+
+def _required_indexes() -> list:
+    """(collection, keys, options) for every index the API relies on."""
+    return [
+        # forgot-password looks employees up by ID and normalized name
+        (collection, [("E_ID", 1), ("E_Name_normalized", 1)], {}),
+        # Only string usernames, so documents written before usernames existed don't collide
+        (collection, [("username", 1)], {"unique": True, "partialFilterExpression": {"username": {"$type": "string"}}}),
+        # Nearby-employee queries use $geoNear on the GeoJSON location
+        (collection, [("location", "2dsphere")], {}),
+        # Import job results are paged per job and kind in CSV order
+        (job_results_collection, [("job_id", 1), ("kind", 1), ("seq", 1)], {}),
+        # Results hold plaintext passwords, so they must expire
+        (job_results_collection, [("created_at", 1)], {"expireAfterSeconds": IMPORT_RESULT_RETENTION_SECONDS}),
+        (jobs_collection, [("status", 1), ("lease_expires_at", 1)], {}),
+    ]
+
+
+async def ensure_indexes():
+    """Check the connection and create the indexes the API relies on; safe to call on every startup."""
+    try:
+        # Will throw an exception if connection fails
+        await get_database().command("ping")
+        print("MongoDB connection successful!")
+    except Exception as e:
+        print(f"Failed to connect to MongoDB: {e}")
+        return
+
+    # Each index separately, so one failure (e.g. duplicate usernames in existing
+    # data) doesn't leave the geo or result-expiry indexes missing too
+    for target, keys, options in _required_indexes():
+        try:
+            await target.create_index(keys, **options)
+        except Exception as e:
+            print(f"Failed to create index {keys} on {target.name}: {e}")
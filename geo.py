@@ -0,0 +1,120 @@
+import json
+import base64
+from bson import ObjectId
+from fastapi import HTTPException
+from database import collection
+from utils import build_location
+
+# Fields returned for nearby employees; an inclusion list so password and session data never leave
+NEARBY_PROJECTION = {
+    "E_ID": 1,
+    "E_Name": 1,
+    "email": 1,
+    "role": 1,
+    "userStatus": 1,
+    "mobile": 1,
+    "altMobile": 1,
+    "latitude": 1,
+    "longitude": 1,
+    "physicalAddress": 1,
+    "username": 1,
+    "distance": 1,
+}
+
+
+def _encode_cursor(distance: float, last_id: str) -> str:
+    payload = json.dumps({"d": distance, "id": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(payload["d"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _geo_near(latitude: float, longitude: float, min_distance: float, max_distance: float, query: dict) -> dict:
+    return {"$geoNear": {
+        "near": build_location(latitude, longitude),
+        "key": "location",
+        "distanceField": "distance",
+        "minDistance": min_distance,
+        "maxDistance": max_distance,
+        "spherical": True,
+        "query": query
+    }}
+
+
+async def find_nearby_employees(
+    latitude: float,
+    longitude: float,
+    radius: float,
+    limit: int,
+    role: str = None,
+    userStatus: str = None,
+    cursor: str = None
+) -> dict:
+    """Return employees within radius metres of a point, nearest first, one page at a time.
+
+    Pages are ordered by (distance, _id) and the cursor holds the last pair
+    returned, so the next page resumes with minDistance instead of skipping.
+    $geoNear streams in distance order, so a page reads limit + 1 documents;
+    only when the page is full are the ties at its last distance fetched,
+    sorted by _id, to settle which of them come first. That costs one extra
+    query bounded by the size of a single tie group, never the whole radius.
+    """
+    query = {}
+    if role is not None:
+        query["role"] = role
+    if userStatus is not None:
+        query["userStatus"] = userStatus
+
+    min_distance = 0.0
+    resume = []
+    if cursor:
+        min_distance, last_id = _decode_cursor(cursor)
+        # minDistance is inclusive; of the ties at that distance, skip those already returned
+        resume = [{"$match": {"$or": [
+            {"distance": {"$gt": min_distance}},
+            {"distance": min_distance, "_id": {"$gt": last_id}}
+        ]}}]
+
+    pipeline = [
+        _geo_near(latitude, longitude, min_distance, radius, query),
+        *resume,
+        {"$limit": limit + 1},
+        {"$project": NEARBY_PROJECTION}
+    ]
+    employees = await collection.aggregate(pipeline).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(employees) > limit:
+        # $geoNear leaves ties in no particular order and the limit may have cut
+        # through the ties at the boundary, so take those in _id order instead
+        boundary = employees[-1]["distance"]
+        ties = [
+            _geo_near(latitude, longitude, boundary, boundary, query),
+            *resume,
+            {"$match": {"distance": boundary}},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit + 1},
+            {"$project": NEARBY_PROJECTION}
+        ]
+        closer = [employee for employee in employees if employee["distance"] < boundary]
+        employees = closer + await collection.aggregate(ties).to_list(length=limit + 1)
+        employees.sort(key=lambda employee: (employee["distance"], employee["_id"]))
+        employees = employees[:limit]
+        last = employees[-1]
+        next_cursor = _encode_cursor(last["distance"], str(last["_id"]))
+    else:
+        employees.sort(key=lambda employee: (employee["distance"], employee["_id"]))
+
+    for employee in employees:
+        employee["_id"] = str(employee["_id"])
+
+    return {
+        "employees": employees,
+        "next_cursor": next_cursor
+    }
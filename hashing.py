@@ -0,0 +1,60 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from utils import hash_password_bcrypt
+
+logger = logging.getLogger(__name__)
+
+# Worker processes used for bcrypt; defaults to one per CPU core
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# bcrypt cost factor, trading login/import throughput against brute-force resistance
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+_executor = None
+
+
+def start_hash_pool() -> None:
+    """Start the process pool used for password hashing."""
+    global _executor
+    if _executor is None:
+        # forkserver, not fork: by now the Motor client has background threads whose
+        # locks a forked child could inherit mid-acquire and deadlock on. Windows has
+        # no forkserver, so spawn there.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context(method))
+        logger.info(f"Started bcrypt hash pool with {HASH_WORKERS} workers (rounds={BCRYPT_ROUNDS})")
+
+
+async def shutdown_hash_pool() -> None:
+    """Stop the password hashing process pool without blocking the event loop."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True)
+
+
+async def hash_password(password: str) -> bytes:
+    """Hash a password with bcrypt without blocking the event loop."""
+    # Falls back to the default thread pool when the app lifespan has not started the pool
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(hash_password_bcrypt, password, BCRYPT_ROUNDS))
+
+
+def _hash_many(passwords: list, rounds: int) -> list:
+    return [hash_password_bcrypt(password, rounds) for password in passwords]
+
+
+async def hash_passwords(passwords: list) -> list:
+    """Hash a batch of passwords in parallel across the pool, preserving order."""
+    # One task per worker rather than per password keeps pool IPC off the critical path
+    loop = asyncio.get_running_loop()
+    size = max(1, -(-len(passwords) // HASH_WORKERS))
+    slices = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    hashed = await asyncio.gather(*(
+        loop.run_in_executor(_executor, partial(_hash_many, part, BCRYPT_ROUNDS)) for part in slices
+    ))
+    return [hashed_pw for part in hashed for hashed_pw in part]
@@ -0,0 +1,260 @@
+import os
+import logging
+import pandas as pd
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from schemas import EmployeeIn
+from database import collection
+from validation import validate_employee_frame
+from hashing import hash_passwords
+from metrics import stage
+from utils import generate_password_from_name, convert_to_mongodb_binary, generate_username, build_employee_profile, build_employee_account, build_employee_document, build_employee_summary
+
+logger = logging.getLogger(__name__)
+
+# Number of CSV rows validated, checked and written per MongoDB round trip
+CSV_BATCH_SIZE = int(os.getenv("CSV_BATCH_SIZE", "1000"))
+
+IMPORT_MODES = ("insert", "sync")
+
+REQUIRED_COLUMNS = {
+    "E_ID", "E_Name", "email", "address1", "address2",
+    "role", "mobile", "altMobile", "latitude",
+    "longitude", "physicalAddress", "userStatus"
+}
+
+
+def _failure(row: int, error) -> dict:
+    logger.warning(f"Failed to process row {row}: {error}")
+    return {"row": row, "error": str(error)}
+
+
+def _username_taken(username: str) -> HTTPException:
+    # Same error create_employee raises, so failed_rows reads identically
+    return HTTPException(status_code=400, detail=f"Username {username} already exists")
+
+
+def _valid_employees(df: pd.DataFrame, row_numbers: list, failed_rows: list) -> list:
+    # Validate the chunk column by column, recording invalid rows as failures
+    with stage("csv_import.validate"):
+        coerced, valid, errors = validate_employee_frame(df)
+    employees = []
+    for row, record, is_valid, row_errors in zip(row_numbers, coerced.to_dict("records"), valid.tolist(), errors):
+        if not is_valid:
+            failed_rows.append(_failure(row, "; ".join(row_errors)))
+            continue
+        # Already validated, so skip per-row Pydantic validation
+        employees.append((row, EmployeeIn.model_construct(**record)))
+    return employees
+
+
+def _write_failure(row: int, error: dict, username: str) -> dict:
+    # Turn a bulk writeError into a failed_rows entry
+    if error.get("code") == 11000:
+        return _failure(row, _username_taken(username))
+    return _failure(row, error.get("errmsg", error))
+
+
+# Bulk add a chunk of CSV rows
+async def insert_employee_frame(df: pd.DataFrame, row_numbers: list, on_prepared=None, raise_on_disconnect: bool = False) -> tuple:
+    """Validate and insert a DataFrame chunk whose rows have the given CSV row numbers.
+
+    Validation is columnar; clashes are found with one $in lookup and writes go
+    through one unordered insert_many. If given, on_prepared is awaited with the
+    (row, document, summary) triples just before the insert, so callers can
+    record generated passwords first. With raise_on_disconnect, a connection
+    error during the insert propagates instead of failing every row, for
+    callers that retry the whole chunk. Returns (employee_summaries,
+    failed_rows) in CSV row order, where employee_summaries holds
+    (row, summary) pairs.
+    """
+    employee_summaries = []
+    failed_rows = []
+
+    # Drop invalid rows and usernames repeated inside the file
+    candidates = []
+    seen_usernames = set()
+    for row, emp in _valid_employees(df, row_numbers, failed_rows):
+        username = generate_username(emp.E_Name, emp.E_ID)
+        if username in seen_usernames:
+            failed_rows.append(_failure(row, _username_taken(username)))
+            continue
+        seen_usernames.add(username)
+        candidates.append((row, emp, username))
+
+    # Check username uniqueness against the collection in a single query
+    existing_usernames = set()
+    if candidates:
+        with stage("csv_import.find"):
+            cursor = collection.find(
+                {"username": {"$in": [username for _, _, username in candidates]}},
+                {"username": 1, "_id": 0}
+            )
+            async for existing_user in cursor:
+                existing_usernames.add(existing_user["username"])
+
+    accepted = []
+    for row, emp, username in candidates:
+        if username in existing_usernames:
+            failed_rows.append(_failure(row, _username_taken(username)))
+            continue
+        # Generate password using name_XXX format
+        accepted.append((row, emp, username, generate_password_from_name(emp.E_Name)))
+
+    # Hash the whole chunk's passwords in parallel across the hash pool
+    with stage("csv_import.hash_password_bcrypt"):
+        hashed_passwords = await hash_passwords([plain_password for _, _, _, plain_password in accepted])
+
+    pending = []
+    for (row, emp, username, plain_password), hashed_pw in zip(accepted, hashed_passwords):
+        encoded_password = convert_to_mongodb_binary(hashed_pw)
+        doc = build_employee_document(emp, username, encoded_password)
+        pending.append((row, doc, build_employee_summary(emp, username, plain_password)))
+
+    if pending and on_prepared is not None:
+        await on_prepared(pending)
+
+    if pending:
+        write_errors = {}
+        try:
+            with stage("csv_import.insert_many"):
+                await collection.insert_many([doc for _, doc, _ in pending], ordered=False)
+        except BulkWriteError as bwe:
+            # Map each failed insert back to its position in this batch
+            for error in bwe.details.get("writeErrors", []):
+                write_errors[error["index"]] = error
+        except Exception as ex:
+            if raise_on_disconnect and isinstance(ex, ConnectionFailure):
+                raise
+            logger.error(f"Error inserting employee batch: {ex}")
+            error = HTTPException(status_code=500, detail="Internal server error while creating employee")
+            write_errors = {index: error for index in range(len(pending))}
+
+        for index, (row, doc, summary) in enumerate(pending):
+            error = write_errors.get(index)
+            if error is None:
+                employee_summaries.append((row, summary))
+            elif isinstance(error, dict):
+                failed_rows.append(_write_failure(row, error, doc["username"]))
+            else:
+                failed_rows.append(_failure(row, error))
+
+    failed_rows.sort(key=lambda failure: failure["row"])
+    return employee_summaries, failed_rows
+
+
+# Sync a chunk of CSV rows against the stored roster
+async def sync_employee_frame(df: pd.DataFrame, row_numbers: list) -> dict:
+    """Upsert only new or changed employees from a DataFrame chunk, matched by E_ID.
+
+    Stored fingerprints for the chunk are fetched in one projected query and
+    changes are written with one unordered bulk_write. Existing employees keep
+    their username and password; only new employees get credentials. E_ID is
+    not unique in the collection, so rows whose E_ID matches more than one
+    stored employee are reported as failed rather than guessed at.
+    """
+    employee_summaries = []
+    updated_employees = []
+    unchanged_count = 0
+    failed_rows = []
+
+    # Drop invalid rows and E_IDs repeated inside the file
+    candidates = []
+    seen_ids = set()
+    for row, emp in _valid_employees(df, row_numbers, failed_rows):
+        if emp.E_ID in seen_ids:
+            failed_rows.append(_failure(row, f"Duplicate E_ID {emp.E_ID} in file"))
+            continue
+        seen_ids.add(emp.E_ID)
+        candidates.append((row, emp, build_employee_profile(emp)))
+
+    existing = {}
+    if candidates:
+        with stage("csv_import.find"):
+            cursor = collection.find(
+                {"E_ID": {"$in": [emp.E_ID for _, emp, _ in candidates]}},
+                {"E_ID": 1, "username": 1, "fingerprint": 1}
+            )
+            async for employee in cursor:
+                existing.setdefault(employee["E_ID"], []).append(employee)
+
+    new_employees = []
+    changed_employees = []
+    for row, emp, profile in candidates:
+        matches = existing.get(emp.E_ID, [])
+        if len(matches) > 1:
+            failed_rows.append(_failure(row, f"E_ID {emp.E_ID} matches {len(matches)} existing employees"))
+            continue
+        stored = matches[0] if matches else None
+        if stored is None:
+            # Generate password using name_XXX format
+            new_employees.append((row, emp, profile, generate_password_from_name(emp.E_Name)))
+        elif stored.get("fingerprint") != profile["fingerprint"]:
+            changed_employees.append((row, emp, profile, stored))
+        else:
+            unchanged_count += 1
+
+    # Only brand new employees need a password hashed
+    with stage("csv_import.hash_password_bcrypt"):
+        hashed_passwords = await hash_passwords([plain_password for _, _, _, plain_password in new_employees])
+
+    operations = []
+    outcomes = []
+    for (row, emp, profile, plain_password), hashed_pw in zip(new_employees, hashed_passwords):
+        username = generate_username(emp.E_Name, emp.E_ID)
+        account = build_employee_account(username, convert_to_mongodb_binary(hashed_pw))
+        operations.append(UpdateOne({"E_ID": emp.E_ID}, {"$set": profile, "$setOnInsert": account}, upsert=True))
+        outcomes.append((row, username, build_employee_summary(emp, username, plain_password)))
+    for row, emp, profile, stored in changed_employees:
+        username = stored.get("username")
+        # By _id, so the update touches exactly the document that was compared
+        operations.append(UpdateOne({"_id": stored["_id"]}, {"$set": profile}))
+        outcomes.append((row, username, {"E_ID": emp.E_ID, "E_Name": emp.E_Name, "Username": username}))
+
+    if operations:
+        write_errors = {}
+        upserted = set()
+        try:
+            with stage("csv_import.bulk_write"):
+                result = await collection.bulk_write(operations, ordered=False)
+            upserted = set(result.upserted_ids)
+        except BulkWriteError as bwe:
+            # Map each failed write back to its position in this batch
+            for error in bwe.details.get("writeErrors", []):
+                write_errors[error["index"]] = error
+            upserted = {entry["index"] for entry in bwe.details.get("upserted", [])}
+        except Exception as ex:
+            logger.error(f"Error syncing employee batch: {ex}")
+            error = HTTPException(status_code=500, detail="Internal server error while creating employee")
+            write_errors = {index: error for index in range(len(operations))}
+
+        raced = []
+        for index, (row, username, outcome) in enumerate(outcomes):
+            error = write_errors.get(index)
+            if error is None and index < len(new_employees) and index not in upserted:
+                # Another import created this E_ID after our lookup, so $setOnInsert never ran:
+                # the profile was updated, but the generated password was never stored
+                raced.append(outcome)
+            elif error is None:
+                (employee_summaries if index < len(new_employees) else updated_employees).append(outcome)
+            elif isinstance(error, dict):
+                failed_rows.append(_write_failure(row, error, username))
+            else:
+                failed_rows.append(_failure(row, error))
+
+        if raced:
+            stored_usernames = {}
+            cursor = collection.find({"E_ID": {"$in": [outcome["E_ID"] for outcome in raced]}}, {"E_ID": 1, "username": 1, "_id": 0})
+            async for employee in cursor:
+                stored_usernames[employee["E_ID"]] = employee.get("username")
+            for outcome in raced:
+                updated_employees.append({"E_ID": outcome["E_ID"], "E_Name": outcome["E_Name"], "Username": stored_usernames.get(outcome["E_ID"])})
+
+    failed_rows.sort(key=lambda failure: failure["row"])
+    return {
+        "employee_summaries": employee_summaries,
+        "updated_employees": updated_employees,
+        "unchanged_count": unchanged_count,
+        "failed_rows": failed_rows
+    }
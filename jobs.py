@@ -0,0 +1,403 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, UploadFile
+from pymongo import ReturnDocument
+from pymongo.errors import ConnectionFailure
+import pandas as pd
+from database import collection, jobs_collection, job_results_collection
+from ingest import CSV_BATCH_SIZE, REQUIRED_COLUMNS, insert_employee_frame
+from validation import CSV_DTYPES
+
+logger = logging.getLogger(__name__)
+
+# Directory where uploaded CSVs are kept until their import job completes or fails.
+# Only processes that can see a job's file pick it up, so for another instance to
+# resume a job whose owner died this must be storage shared by every instance.
+IMPORT_DIR = os.getenv("IMPORT_DIR", "imports")
+
+# Number of import jobs processed concurrently by this app instance
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+
+# Seconds a worker's claim on a job stays valid without a heartbeat;
+# a running job whose lease has lapsed is resumed by whichever process claims it next
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+UPLOAD_READ_SIZE = 1024 * 1024
+
+HOSTNAME = socket.gethostname()
+
+# Identifies this process as the owner of the jobs it claims
+WORKER_ID = f"{HOSTNAME}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+RESULT_KINDS = ("employee_summaries", "failed_rows")
+
+_queue = None
+_workers = []
+
+
+class _LeaseLost(Exception):
+    """Another process took over the job after this worker's lease lapsed."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def create_import_job(file: UploadFile) -> str:
+    """Store the uploaded CSV on local disk, record a queued job and return its ID."""
+    job_id = uuid.uuid4().hex
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_DIR, f"{job_id}.csv")
+
+    with open(path, "wb") as out:
+        while chunk := await file.read(UPLOAD_READ_SIZE):
+            out.write(chunk)
+
+    # Reject files with missing columns before queueing any work
+    try:
+        columns = set(pd.read_csv(path, nrows=0).columns)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {e}")
+    if not REQUIRED_COLUMNS.issubset(columns):
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=f"Missing columns: {REQUIRED_COLUMNS - columns}")
+
+    await jobs_collection.insert_one({
+        "_id": job_id,
+        "filename": file.filename,
+        "path": path,
+        "host": HOSTNAME,  # Where the upload was stored
+        "status": "queued",
+        "total_rows": None,
+        "next_row": 0,  # Rows before this offset belong to committed chunks
+        "rows_processed": 0,
+        "rows_succeeded": 0,
+        "rows_failed": 0,
+        "processing_seconds": 0.0,
+        "error": None,
+        "owner": None,
+        "lease_expires_at": None,
+        "created_at": _now(),
+        "updated_at": _now(),
+    })
+    await _queue.put(job_id)
+    return job_id
+
+
+def _count_rows(path: str) -> int:
+    return sum(len(chunk) for chunk in pd.read_csv(path, usecols=[0], chunksize=CSV_BATCH_SIZE))
+
+
+def _lease_deadline() -> datetime:
+    return _now() + timedelta(seconds=JOB_LEASE_SECONDS)
+
+
+async def _claim_job(job_id: str):
+    """Atomically take ownership of a queued job, or a running one whose lease has lapsed."""
+    return await jobs_collection.find_one_and_update(
+        {
+            "_id": job_id,
+            "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lt": _now()}},
+                {"status": "running", "lease_expires_at": None},
+            ],
+        },
+        {"$set": {"status": "running", "owner": WORKER_ID, "lease_expires_at": _lease_deadline(), "updated_at": _now()}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def _update_owned_job(job_id: str, update: dict) -> None:
+    # Every write after the claim is conditional on still owning the job
+    result = await jobs_collection.update_one({"_id": job_id, "owner": WORKER_ID}, update)
+    if result.matched_count == 0:
+        raise _LeaseLost(job_id)
+
+
+async def _heartbeat(job_id: str) -> None:
+    # Keep the lease alive while a long chunk (e.g. bcrypt-heavy) is in flight
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        try:
+            await _update_owned_job(job_id, {"$set": {"lease_expires_at": _lease_deadline()}})
+        except ConnectionFailure as e:
+            # Two more tries before the lease lapses
+            logger.warning(f"Heartbeat for import job {job_id} failed: {e}")
+
+
+async def _release_lease(job_id: str) -> None:
+    # Left as "running" with a lapsed lease so the next sweep, here or elsewhere, resumes it
+    try:
+        await jobs_collection.update_one(
+            {"_id": job_id, "owner": WORKER_ID, "status": "running"},
+            {"$set": {"lease_expires_at": _now()}}
+        )
+    except ConnectionFailure:
+        # The lease lapses by itself within JOB_LEASE_SECONDS
+        pass
+
+
+async def _run_job(job_id: str) -> None:
+    job = await _claim_job(job_id)
+    if not job:
+        # Finished, or currently leased by another worker
+        return
+
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        await _process_job(job)
+    finally:
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+
+
+async def _record_pending(job_id: str, prepared: list) -> None:
+    # Written before the employees are inserted, so a crash mid-chunk cannot lose their passwords
+    await job_results_collection.insert_many([
+        {"job_id": job_id, "kind": "pending", "seq": row, "data": summary, "password": doc["password"], "created_at": _now()}
+        for row, doc, summary in prepared
+    ])
+
+
+async def _recover_pending(job_id: str, first_row: int, last_row: int, summaries: list, failures: list) -> tuple:
+    """Turn "already exists" failures for rows this job itself inserted before a crash back into summaries."""
+    pending = {}
+    cursor = job_results_collection.find({"job_id": job_id, "kind": "pending", "seq": {"$gte": first_row, "$lte": last_row}})
+    async for result in cursor:
+        pending[result["seq"]] = result
+    if not pending or not failures:
+        return summaries, failures
+
+    candidates = [failure for failure in failures if failure["row"] in pending]
+    stored = {}
+    if candidates:
+        usernames = [pending[failure["row"]]["data"]["Username"] for failure in candidates]
+        async for employee in collection.find({"username": {"$in": usernames}}, {"username": 1, "password": 1}):
+            stored[employee["username"]] = employee["password"]
+
+    remaining = []
+    for failure in failures:
+        result = pending.get(failure["row"])
+        # The stored hash matches the one this job generated, so the row was created by us
+        if result is not None and stored.get(result["data"]["Username"]) == result["password"]:
+            summaries.append((failure["row"], result["data"]))
+        else:
+            remaining.append(failure)
+    return summaries, remaining
+
+
+def _remove_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _process_job(job: dict) -> None:
+    job_id = job["_id"]
+    next_row = job["next_row"]
+
+    # Results of a chunk that was interrupted before its commit are redone;
+    # its pending records stay so rows it already inserted can be recovered
+    await job_results_collection.delete_many({"job_id": job_id, "kind": {"$in": list(RESULT_KINDS)}, "seq": {"$gt": next_row}})
+
+    if job["total_rows"] is None:
+        total_rows = await asyncio.to_thread(_count_rows, job["path"])
+        await _update_owned_job(job_id, {"$set": {"total_rows": total_rows}})
+
+    async def record_pending(prepared):
+        await _record_pending(job_id, prepared)
+
+    reader = pd.read_csv(job["path"], chunksize=CSV_BATCH_SIZE, skiprows=range(1, next_row + 1), dtype=CSV_DTYPES)
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, reader, None)
+            if chunk is None:
+                break
+
+            started = time.perf_counter()
+            row_count = len(chunk)
+            first_row, last_row = next_row + 1, next_row + row_count
+            summaries, failures = await insert_employee_frame(
+                chunk, list(range(first_row, last_row + 1)), on_prepared=record_pending, raise_on_disconnect=True
+            )
+            summaries, failures = await _recover_pending(job_id, first_row, last_row, summaries, failures)
+
+            # seq is the CSV row, so results page in row order
+            results = [
+                {"job_id": job_id, "kind": "employee_summaries", "seq": row, "data": summary, "created_at": _now()}
+                for row, summary in summaries
+            ] + [
+                {"job_id": job_id, "kind": "failed_rows", "seq": failure["row"], "data": failure, "created_at": _now()}
+                for failure in failures
+            ]
+            if results:
+                await job_results_collection.insert_many(results)
+
+            # Commit the chunk so a restarted worker resumes after it
+            next_row += row_count
+            await _update_owned_job(
+                job_id,
+                {
+                    "$set": {"next_row": next_row, "lease_expires_at": _lease_deadline(), "updated_at": _now()},
+                    "$inc": {
+                        "rows_processed": row_count,
+                        "rows_succeeded": len(summaries),
+                        "rows_failed": len(failures),
+                        "processing_seconds": time.perf_counter() - started,
+                    },
+                }
+            )
+            await job_results_collection.delete_many({"job_id": job_id, "kind": "pending", "seq": {"$lte": next_row}})
+    finally:
+        reader.close()
+
+    await _update_owned_job(
+        job_id,
+        {"$set": {"status": "completed", "owner": None, "lease_expires_at": None, "updated_at": _now()}}
+    )
+    _remove_upload(job["path"])
+
+
+async def _worker() -> None:
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run_job(job_id)
+        except asyncio.CancelledError:
+            await _release_lease(job_id)
+            raise
+        except _LeaseLost:
+            logger.warning(f"Lost lease on import job {job_id}; another worker has taken it over")
+        except ConnectionFailure as e:
+            # Includes AutoReconnect and network timeouts; the job resumes from its last committed chunk
+            logger.warning(f"Import job {job_id} interrupted by a database connection error, will retry: {e}")
+            await _release_lease(job_id)
+        except Exception as e:
+            # Anything else, e.g. a missing or unparseable file, would fail again on retry
+            logger.error(f"Import job {job_id} failed: {e}")
+            try:
+                job = await jobs_collection.find_one_and_update(
+                    {"_id": job_id, "owner": WORKER_ID},
+                    {"$set": {"status": "failed", "error": str(e), "owner": None, "lease_expires_at": None, "updated_at": _now()}}
+                )
+            except ConnectionFailure:
+                # Still "running"; once the lease lapses the job is retried and fails again
+                job = None
+            # A failed job is never retried, so its upload is not needed any more
+            if job:
+                _remove_upload(job["path"])
+        finally:
+            _queue.task_done()
+
+
+def _can_process(job: dict) -> bool:
+    # The upload may live on another instance's local disk; leave those jobs to it.
+    # On the host that stored it, a missing file is claimed anyway so the job fails.
+    return os.path.exists(job["path"]) or job.get("host") == HOSTNAME
+
+
+async def _enqueue_claimable_jobs() -> None:
+    # Only queued jobs and running jobs whose owner stopped heartbeating
+    cursor = jobs_collection.find(
+        {"$or": [
+            {"status": "queued"},
+            {"status": "running", "lease_expires_at": {"$lt": _now()}},
+            {"status": "running", "lease_expires_at": None},
+        ]},
+        {"_id": 1, "path": 1, "host": 1}
+    ).sort("created_at", 1)
+    async for job in cursor:
+        if not _can_process(job):
+            logger.debug(f"Skipping import job {job['_id']}; its upload is not on this host")
+            continue
+        logger.info(f"Resuming import job {job['_id']}")
+        await _queue.put(job["_id"])
+
+
+async def _reaper() -> None:
+    # Pick up jobs abandoned by other processes that crash while this one keeps running
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS)
+        try:
+            await _enqueue_claimable_jobs()
+        except ConnectionFailure as e:
+            logger.warning(f"Sweep for claimable import jobs failed: {e}")
+
+
+async def start_import_workers() -> None:
+    """Start the background import workers and queue jobs that are unclaimed or whose lease has lapsed."""
+    global _queue, _workers
+    _queue = asyncio.Queue()
+    _workers = [asyncio.create_task(_worker()) for _ in range(IMPORT_WORKERS)]
+    _workers.append(asyncio.create_task(_reaper()))
+    await _enqueue_claimable_jobs()
+
+
+async def stop_import_workers() -> None:
+    """Cancel the background import workers."""
+    global _workers
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers = []
+
+
+async def get_job_progress(job_id: str) -> dict:
+    """Return processing counters, throughput and ETA for an import job."""
+    job = await jobs_collection.find_one({"_id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    rows_per_second = None
+    eta_seconds = None
+    if job["processing_seconds"] > 0:
+        rows_per_second = job["rows_processed"] / job["processing_seconds"]
+        if job["total_rows"] is not None and rows_per_second > 0:
+            eta_seconds = max(job["total_rows"] - job["rows_processed"], 0) / rows_per_second
+
+    return {
+        "job_id": job_id,
+        "filename": job["filename"],
+        "status": job["status"],
+        "total_rows": job["total_rows"],
+        "rows_processed": job["rows_processed"],
+        "rows_succeeded": job["rows_succeeded"],
+        "rows_failed": job["rows_failed"],
+        "rows_per_second": rows_per_second,
+        "eta_seconds": eta_seconds,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def get_job_results(job_id: str, kind: str, skip: int, limit: int) -> dict:
+    """Return one page of an import job's employee_summaries or failed_rows.
+
+    Results include generated plaintext passwords and expire after
+    IMPORT_RESULT_RETENTION_SECONDS (24 hours by default).
+    """
+    if kind not in RESULT_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {list(RESULT_KINDS)}")
+    if not await jobs_collection.find_one({"_id": job_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    query = {"job_id": job_id, "kind": kind}
+    cursor = job_results_collection.find(query, {"data": 1}).sort("seq", 1).skip(skip).limit(limit)
+    items = [result["data"] async for result in cursor]
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "skip": skip,
+        "limit": limit,
+        "total": await job_results_collection.count_documents(query),
+        kind: items,
+    }
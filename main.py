@@ -1,10 +1,19 @@
-from datetime import datetime
+import asyncio
+import json
+from contextlib import asynccontextmanager
 from io import StringIO
-from fastapi import FastAPI, File, UploadFile, HTTPException, Body
+from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from schemas import EmployeeIn
-from database import collection
-from utils import generate_password_from_name,convert_to_mongodb_binary, hash_password_bcrypt, generate_username
+from database import collection, ensure_indexes
+from utils import generate_password_from_name,convert_to_mongodb_binary, generate_username, normalize_name, build_employee_document, build_employee_summary
+from hashing import start_hash_pool, shutdown_hash_pool, hash_password
+from metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics, stage
+from ingest import CSV_BATCH_SIZE, IMPORT_MODES, REQUIRED_COLUMNS, insert_employee_frame, sync_employee_frame
+from validation import CSV_DTYPES
+from geo import find_nearby_employees
+from jobs import create_import_job, get_job_progress, get_job_results, start_import_workers, stop_import_workers
 import pandas as pd
 import logging
 
@@ -12,8 +21,20 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ensure indexes and start/stop the bcrypt process pool and import workers with the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    start_hash_pool()
+    await start_import_workers()
+    try:
+        yield
+    finally:
+        await stop_import_workers()
+        await shutdown_hash_pool()
+
 # FastAPI App Initialization
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +43,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Create single employee record
 async def create_employee(emp: EmployeeIn) -> dict:
@@ -29,34 +51,23 @@ async def create_employee(emp: EmployeeIn) -> dict:
         username = generate_username(emp.E_Name, emp.E_ID)
         
         # Check username uniqueness
-        existing_user = await collection.find_one({"username": username})
+        with stage("create_employee.find_one"):
+            existing_user = await collection.find_one({"username": username})
         if existing_user:
             raise HTTPException(status_code=400, detail=f"Username {username} already exists")
         
         # Generate password using name_XXX format
         plain_password = generate_password_from_name(emp.E_Name)
-        hashed_pw = hash_password_bcrypt(plain_password)
+        with stage("create_employee.hash_password_bcrypt"):
+            hashed_pw = await hash_password(plain_password)
         encoded_password = convert_to_mongodb_binary(hashed_pw)
 
-        doc = emp.dict()
-        doc.update({
-            "username": username,
-            "password": encoded_password,
-            "activeTimestamp": datetime.now().strftime("%d/%m/%Y, %I:%M:%S %p"),
-            "currentDeviceID": "",
-            "currentSession": ""
-        })
+        doc = build_employee_document(emp, username, encoded_password)
 
-        await collection.insert_one(doc)
+        with stage("create_employee.insert_one"):
+            await collection.insert_one(doc)
 
-        return {
-            "E_ID": emp.E_ID,
-            "E_Name": emp.E_Name,
-            "email": emp.email,
-            "userStatus": emp.userStatus,
-            "Username": username,
-            "Password": plain_password  # Returns the plain password for user reference
-        }
+        return build_employee_summary(emp, username, plain_password)
 
     except HTTPException:
         # Re-raise HTTPException to preserve the status code and message
@@ -76,37 +87,44 @@ async def add_employee(emp: EmployeeIn):
 
 # Bulk add via CSV  
 @app.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(file: UploadFile = File(...), mode: str = Query("insert")):
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed.")
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {list(IMPORT_MODES)}")
 
     try:
-        contents = await file.read()
-        file_str = contents.decode("utf-8")
-        csv_file = StringIO(file_str)
-        df = pd.read_csv(csv_file)
-
-        required_columns = {
-            "E_ID", "E_Name", "email", "address1", "address2",
-            "role", "mobile", "altMobile", "latitude",
-            "longitude", "physicalAddress", "userStatus"
-        }
+        with stage("upload_csv.parse"):
+            contents = await file.read()
+            file_str = contents.decode("utf-8")
+            csv_file = StringIO(file_str)
+            df = pd.read_csv(csv_file, dtype=CSV_DTYPES)
 
-        if not required_columns.issubset(df.columns):
-            missing = required_columns - set(df.columns)
+        if not REQUIRED_COLUMNS.issubset(df.columns):
+            missing = REQUIRED_COLUMNS - set(df.columns)
             raise HTTPException(status_code=400, detail=f"Missing columns: {missing}")
 
+        # Nightly roster re-uploads: upsert only new or changed employees
+        if mode == "sync":
+            result = {"employee_summaries": [], "updated_employees": [], "unchanged_count": 0, "failed_rows": []}
+            for start in range(0, len(df), CSV_BATCH_SIZE):
+                chunk = df.iloc[start:start + CSV_BATCH_SIZE]
+                synced = await sync_employee_frame(chunk, [index + 1 for index in chunk.index])
+                result["employee_summaries"].extend(synced["employee_summaries"])
+                result["updated_employees"].extend(synced["updated_employees"])
+                result["unchanged_count"] += synced["unchanged_count"]
+                result["failed_rows"].extend(synced["failed_rows"])
+            return {"message": "CSV synced", **result}
+
         employee_summaries = []
         failed_rows = []
 
-        for index, row in df.iterrows():
-            try:
-                employee_data = EmployeeIn(**row.to_dict())
-                result = await create_employee(employee_data)
-                employee_summaries.append(result)
-            except Exception as e:
-                logger.warning(f"Failed to process row {index + 1}: {e}")
-                failed_rows.append({"row": index + 1, "error": str(e)})
+        # One username lookup and one bulk insert per chunk instead of per row
+        for start in range(0, len(df), CSV_BATCH_SIZE):
+            chunk = df.iloc[start:start + CSV_BATCH_SIZE]
+            summaries, failures = await insert_employee_frame(chunk, [index + 1 for index in chunk.index])
+            employee_summaries.extend(summary for _, summary in summaries)
+            failed_rows.extend(failures)
 
         return {
             "message": "CSV processed",
@@ -114,11 +132,84 @@ async def upload_csv(file: UploadFile = File(...)):
             "failed_rows": failed_rows
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"CSV Upload Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to process CSV file")
 
 
+# Bulk add via CSV, streaming one NDJSON line per row with bounded memory
+@app.post("/upload-csv/stream")
+async def upload_csv_stream(file: UploadFile = File(...)):
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV files are allowed.")
+
+    # Parse the spooled upload incrementally instead of loading it whole
+    try:
+        reader = pd.read_csv(file.file, chunksize=CSV_BATCH_SIZE, encoding="utf-8", dtype=CSV_DTYPES)
+        chunk = await asyncio.to_thread(next, reader, None)
+    except Exception as e:
+        logger.error(f"CSV Upload Error: {e}")
+        raise HTTPException(status_code=400, detail="Failed to parse CSV file")
+    if chunk is None:
+        raise HTTPException(status_code=400, detail="CSV file has no rows")
+
+    # Header check happens once, before the response starts
+    if not REQUIRED_COLUMNS.issubset(chunk.columns):
+        missing = REQUIRED_COLUMNS - set(chunk.columns)
+        raise HTTPException(status_code=400, detail=f"Missing columns: {missing}")
+
+    async def stream_rows(chunk):
+        try:
+            while chunk is not None:
+                summaries, failures = await insert_employee_frame(chunk, [index + 1 for index in chunk.index])
+                # One line per CSV row, in row order, each carrying its row number
+                lines = [(row, {"row": row, "status": "success", "employee_summary": summary}) for row, summary in summaries]
+                lines += [(failure["row"], {"row": failure["row"], "status": "failed", "error": failure["error"]}) for failure in failures]
+                for _, line in sorted(lines, key=lambda item: item[0]):
+                    yield json.dumps(line) + "\n"
+                chunk = await asyncio.to_thread(next, reader, None)
+        except Exception as e:
+            logger.error(f"CSV Upload Error: {e}")
+            yield json.dumps({"status": "error", "error": "Failed to process CSV file"}) + "\n"
+        finally:
+            reader.close()
+
+    return StreamingResponse(stream_rows(chunk), media_type="application/x-ndjson")
+
+# Queue a CSV for background import and return its job ID
+@app.post("/upload-csv/jobs", status_code=202)
+async def upload_csv_job(file: UploadFile = File(...)):
+    """Queue a CSV import. Results, including each new employee's generated
+    password, can be fetched for IMPORT_RESULT_RETENTION_SECONDS (24 hours by
+    default) and are then deleted."""
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV files are allowed.")
+
+    job_id = await create_import_job(file)
+    return {
+        "message": "CSV import queued",
+        "job_id": job_id
+    }
+
+# Import job progress
+@app.get("/upload-csv/jobs/{job_id}")
+async def upload_csv_job_status(job_id: str):
+    return await get_job_progress(job_id)
+
+# Page through an import job's employee_summaries or failed_rows
+@app.get("/upload-csv/jobs/{job_id}/results")
+async def upload_csv_job_results(
+    job_id: str,
+    kind: str = Query("employee_summaries"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Page through an import job's results. employee_summaries contain the
+    generated plaintext passwords; all results are deleted
+    IMPORT_RESULT_RETENTION_SECONDS (24 hours by default) after they are written."""
+    return await get_job_results(job_id, kind, skip, limit)
 
 
 # Forgot Password API
@@ -127,12 +218,12 @@ async def forgot_password(
     E_Name: str = Body(..., embed=True),
     E_ID: int = Body(..., embed=True)
 ):
-    E_Name_cleaned = " ".join(E_Name.strip().lower().split())
-
-    employee = await collection.find_one({
-        "E_Name": {"$regex": f"^{E_Name_cleaned}$", "$options": "i"},
-        "E_ID": E_ID
-    })
+    # Point lookup on the (E_ID, E_Name_normalized) index
+    with stage("forgot_password.find_one"):
+        employee = await collection.find_one({
+            "E_ID": E_ID,
+            "E_Name_normalized": normalize_name(E_Name)
+        })
 
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
@@ -140,13 +231,15 @@ async def forgot_password(
     try:
         # Generate new password using name_XXX format (same name, new 3 digits)
         new_plain_password = generate_password_from_name(employee["E_Name"])
-        hashed_password_bytes = hash_password_bcrypt(new_plain_password)
+        with stage("forgot_password.hash_password_bcrypt"):
+            hashed_password_bytes = await hash_password(new_plain_password)
         base64_encoded_password = convert_to_mongodb_binary(hashed_password_bytes)
 
-        await collection.update_one(
-            {"_id": employee["_id"]},
-            {"$set": {"password": base64_encoded_password}}
-        )
+        with stage("forgot_password.update_one"):
+            await collection.update_one(
+                {"_id": employee["_id"]},
+                {"$set": {"password": base64_encoded_password}}
+            )
 
         return {
             "message": "Password reset successfully.",
@@ -156,4 +249,27 @@ async def forgot_password(
     except Exception as e:
         logger.error(f"Password reset failed for {E_Name} (ID: {E_ID}): {e}")
         raise HTTPException(status_code=500, detail="Failed to reset password")
- 
\ No newline at end of file
+ 
+
+
+# Employees near a point, nearest first, paginated by cursor
+@app.get("/employees/nearby")
+async def employees_nearby(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius: float = Query(..., gt=0, description="Search radius in metres"),
+    role: str = Query(None),
+    userStatus: str = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None)
+):
+    with stage("employees_nearby.geo_near"):
+        return await find_nearby_employees(latitude, longitude, radius, limit, role, userStatus, cursor)
+
+
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,201 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from pymongo import monitoring
+
+# Set METRICS_ENABLED=false to skip all recording and hide /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., +Inf count, count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 3)
+            # Buckets are stored per-interval and made cumulative on render
+            series[bisect_left(self.buckets, value)] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.label_names, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-2]}")
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_count{labels} {series[-2]}")
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP responses by route and status code.", ("method", "route", "status")
+)
+STAGE_LATENCY = Histogram(
+    "app_stage_duration_seconds", "Latency of internal processing stages.", ("stage",)
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency reported by the driver.", ("command", "outcome")
+)
+MONGO_POOL_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a MongoDB connection from the pool.", ()
+)
+
+REGISTRY = (REQUEST_LATENCY, REQUEST_COUNT, STAGE_LATENCY, MONGO_COMMAND_LATENCY, MONGO_POOL_WAIT)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block of work as an app_stage_duration_seconds observation."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - started, name)
+
+
+def render_metrics() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and status counts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - started, scope["method"], route_path)
+            REQUEST_COUNT.inc(scope["method"], route_path, str(status))
+
+
+class _CommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_LATENCY.observe(event.duration_micros / 1_000_000, event.command_name, "succeeded")
+
+    def failed(self, event):
+        MONGO_COMMAND_LATENCY.observe(event.duration_micros / 1_000_000, event.command_name, "failed")
+
+
+class _PoolListener(monitoring.ConnectionPoolListener):
+    def connection_checked_out(self, event):
+        MONGO_POOL_WAIT.observe(event.duration)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+def mongo_event_listeners() -> list:
+    """Driver listeners to pass to the Motor client, empty when metrics are off."""
+    if not METRICS_ENABLED:
+        return []
+    return [_CommandListener(), _PoolListener()]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 class EmployeeIn(BaseModel):
     E_ID: int
     E_Name: str
@@ -8,8 +8,9 @@ class EmployeeIn(BaseModel):
     role: str
     mobile: int
     altMobile: int
-    latitude: float
-    longitude: float
+    # Bounded so the stored GeoJSON location is always indexable
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
     physicalAddress: str
     userStatus: str
 class EmployeeSummary(BaseModel):
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+# The app modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Read at import time; the lowest cost keeps tests that create employees fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import database  # noqa: E402
+from benchmarks.fake_mongo import FakeDatabase  # noqa: E402
+
+HEADER = "E_ID,E_Name,email,address1,address2,role,mobile,altMobile,latitude,longitude,physicalAddress,userStatus"
+
+
+def csv_row(e_id="1", name="Asha Rao", email=None, mobile="9000000000", latitude="12.97", longitude="77.59", role="field") -> str:
+    email = email if email is not None else f"user{e_id}@example.com"
+    return f"{e_id},{name},{email},1 Main Street,Block 1,{role},{mobile},8000000000,{latitude},{longitude},1 Main Street,active"
+
+
+@pytest.fixture
+def db():
+    """A fresh in-process fake database behind the app's collections."""
+    fake = FakeDatabase()
+    database.set_database(fake)
+    yield fake
+    database.set_database(None)
@@ -0,0 +1,91 @@
+"""Nearby-employee paging: (distance, _id) order across pages, including ties at one distance."""
+import json
+import base64
+import random
+import asyncio
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from geo import find_nearby_employees
+from utils import build_location
+
+CENTER = (12.97, 77.59)
+
+
+async def _seed(db, offsets: list, role: str = "field") -> list:
+    # Employees sharing an offset are tied on distance; insert in shuffled _id
+    # order so ties do not come back from $geoNear already sorted by _id
+    docs = [
+        {"_id": ObjectId(), "E_ID": index, "role": role, "location": build_location(CENTER[0] + offset, CENTER[1])}
+        for index, offset in enumerate(offsets)
+    ]
+    shuffled = docs[:]
+    random.Random(0).shuffle(shuffled)
+    await db["testUsers"].insert_many(shuffled)
+    return docs
+
+
+async def _all_pages(limit: int, radius: float = 5000, **filters) -> tuple:
+    employees, cursors, cursor = [], [], None
+    while True:
+        page = await find_nearby_employees(*CENTER, radius, limit, cursor=cursor, **filters)
+        employees += page["employees"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return employees, cursors
+        cursors.append(cursor)
+
+
+def test_pages_cover_ties_once_in_distance_then_id_order(db):
+    async def scenario():
+        # Three tie groups straddling page boundaries, plus one employee out of range
+        docs = await _seed(db, [0.001] * 10 + [0.002] * 7 + [0.003] * 5 + [1.0])
+        employees, cursors = await _all_pages(limit=4)
+
+        returned = [(employee["distance"], employee["_id"]) for employee in employees]
+        assert returned == sorted(returned)
+        assert [employee["_id"] for employee in employees] == [
+            str(doc["_id"]) for doc in sorted(docs[:22], key=lambda doc: (round(doc["location"]["coordinates"][1], 3), doc["_id"]))
+        ]
+        # The cursor is the last (distance, _id) only, however many ties there are
+        assert all(set(json.loads(base64.urlsafe_b64decode(cursor))) == {"d", "id"} for cursor in cursors)
+
+    asyncio.run(scenario())
+
+
+def test_filters_apply_on_every_page(db):
+    async def scenario():
+        await _seed(db, [0.001] * 6, role="field")
+        await _seed(db, [0.001] * 6, role="office")
+        employees, _ = await _all_pages(limit=4, role="office")
+        assert len(employees) == 6
+        assert {employee["role"] for employee in employees} == {"office"}
+
+    asyncio.run(scenario())
+
+
+def test_page_query_does_not_sort_the_whole_radius(db):
+    async def scenario():
+        await _seed(db, [0.001] * 3 + [0.002] * 3)
+        pipelines = []
+        aggregate = db["testUsers"].aggregate
+
+        def recording(pipeline):
+            pipelines.append(pipeline)
+            return aggregate(pipeline)
+
+        db["testUsers"].aggregate = recording
+        await find_nearby_employees(*CENTER, 5000, 2)
+        for pipeline in pipelines:
+            geo_near = pipeline[0]["$geoNear"]
+            if any("$sort" in stage for stage in pipeline):
+                # Only the ties at a single distance are ever sorted
+                assert geo_near["minDistance"] == geo_near["maxDistance"]
+
+    asyncio.run(scenario())
+
+
+def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(find_nearby_employees(*CENTER, 5000, 4, cursor="not-a-cursor"))
+    assert raised.value.status_code == 400
@@ -0,0 +1,147 @@
+"""Background CSV import jobs: lease claims, resume from the last committed chunk and crash recovery."""
+import io
+import asyncio
+from datetime import timedelta
+import bcrypt
+import pytest
+from fastapi import UploadFile
+from pymongo.errors import AutoReconnect
+import jobs
+from conftest import HEADER, csv_row
+
+
+@pytest.fixture
+def import_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "IMPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "CSV_BATCH_SIZE", 2)
+    return tmp_path
+
+
+def _csv(rows: int) -> bytes:
+    return "\n".join([HEADER] + [csv_row(e_id=str(e_id), name=f"Name{e_id} Rao") for e_id in range(1, rows + 1)]).encode("utf-8")
+
+
+async def _create_job(rows: int) -> str:
+    jobs._queue = asyncio.Queue()
+    job_id = await jobs.create_import_job(UploadFile(io.BytesIO(_csv(rows)), filename="roster.csv"))
+    jobs._queue.get_nowait()
+    return job_id
+
+
+async def _run_worker(job_id: str) -> None:
+    jobs._queue = asyncio.Queue()
+    worker = asyncio.create_task(jobs._worker())
+    await jobs._queue.put(job_id)
+    await jobs._queue.join()
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+
+
+async def _results(job_id: str, kind: str) -> list:
+    return (await jobs.get_job_results(job_id, kind, 0, 100))[kind]
+
+
+def test_claim_is_exclusive_until_the_lease_lapses(db, import_dir):
+    async def scenario():
+        job_id = await _create_job(1)
+        assert (await jobs._claim_job(job_id))["owner"] == jobs.WORKER_ID
+        assert await jobs._claim_job(job_id) is None
+
+        await db["importJobs"].update_one({"_id": job_id}, {"$set": {"lease_expires_at": jobs._now() - timedelta(seconds=1)}})
+        assert await jobs._claim_job(job_id) is not None
+
+    asyncio.run(scenario())
+
+
+def test_running_job_without_a_lease_is_claimable(db, import_dir):
+    async def scenario():
+        job_id = await _create_job(1)
+        await db["importJobs"].update_one({"_id": job_id}, {"$set": {"status": "running"}, "$unset": {"lease_expires_at": ""}})
+        assert await jobs._claim_job(job_id) is not None
+
+    asyncio.run(scenario())
+
+
+def test_writes_after_losing_the_lease_are_refused(db, import_dir):
+    async def scenario():
+        job_id = await _create_job(1)
+        await jobs._claim_job(job_id)
+        await db["importJobs"].update_one({"_id": job_id}, {"$set": {"owner": "another-worker"}})
+        with pytest.raises(jobs._LeaseLost):
+            await jobs._update_owned_job(job_id, {"$set": {"next_row": 1}})
+
+    asyncio.run(scenario())
+
+
+def test_resumes_after_the_last_committed_chunk(db, import_dir):
+    async def scenario():
+        job_id = await _create_job(5)
+        # The first chunk (rows 1-2) was committed by a worker that then died
+        await db["importJobs"].update_one({"_id": job_id}, {"$set": {"next_row": 2}})
+        await _run_worker(job_id)
+
+        job = await jobs.get_job_progress(job_id)
+        assert job["status"] == "completed"
+        assert job["rows_processed"] == 3
+        assert [summary["E_ID"] for summary in await _results(job_id, "employee_summaries")] == [3, 4, 5]
+        assert await db["testUsers"].count_documents({}) == 3
+
+    asyncio.run(scenario())
+
+
+def test_rows_inserted_before_a_connection_error_are_recovered(db, import_dir):
+    async def scenario():
+        job_id = await _create_job(3)
+        employees = db["testUsers"]
+        insert_many = employees.insert_many
+        calls = []
+
+        async def insert_then_disconnect(documents, ordered=True):
+            # The write lands, but the reply is lost
+            result = await insert_many(documents, ordered=ordered)
+            if not calls:
+                calls.append(1)
+                raise AutoReconnect("connection reset")
+            return result
+
+        employees.insert_many = insert_then_disconnect
+        await _run_worker(job_id)
+        job = await db["importJobs"].find_one({"_id": job_id})
+        assert job["status"] == "running"
+        assert job["lease_expires_at"] <= jobs._now()
+
+        await _run_worker(job_id)
+        assert (await jobs.get_job_progress(job_id))["status"] == "completed"
+        assert await _results(job_id, "failed_rows") == []
+        summaries = await _results(job_id, "employee_summaries")
+        assert [summary["E_ID"] for summary in summaries] == [1, 2, 3]
+        # The reported passwords are the ones actually stored
+        for summary in summaries:
+            stored = await employees.find_one({"username": summary["Username"]})
+            assert bcrypt.checkpw(summary["Password"].encode("utf-8"), bytes(stored["password"]))
+
+    asyncio.run(scenario())
+
+
+def test_unreadable_upload_fails_the_job(db, import_dir):
+    async def scenario():
+        job_id = await _create_job(2)
+        job = await db["importJobs"].find_one({"_id": job_id})
+        with open(job["path"], "w") as upload:
+            upload.write("E_ID\n\"unterminated")
+        await _run_worker(job_id)
+        assert (await jobs.get_job_progress(job_id))["status"] == "failed"
+
+    asyncio.run(scenario())
+
+
+def test_jobs_stored_on_another_host_are_left_to_it(db, import_dir):
+    async def scenario():
+        mine = await _create_job(1)
+        theirs = await _create_job(1)
+        await db["importJobs"].update_one({"_id": theirs}, {"$set": {"host": "another-host", "path": "/elsewhere/roster.csv"}})
+        jobs._queue = asyncio.Queue()
+        await jobs._enqueue_claimable_jobs()
+        assert [jobs._queue.get_nowait() for _ in range(jobs._queue.qsize())] == [mine]
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+"""Sync-mode CSV imports: classifying rows as new, changed, unchanged or ambiguous by E_ID."""
+import io
+import asyncio
+import pandas as pd
+from conftest import HEADER, csv_row
+from ingest import sync_employee_frame
+from validation import CSV_DTYPES
+
+
+def _frame(*rows: str) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO("\n".join([HEADER, *rows])), dtype=CSV_DTYPES)
+
+
+async def _sync(*rows: str) -> dict:
+    return await sync_employee_frame(_frame(*rows), list(range(1, len(rows) + 1)))
+
+
+def test_classifies_new_changed_and_unchanged_rows(db):
+    async def scenario():
+        first = await _sync(csv_row(e_id="1"), csv_row(e_id="2"))
+        assert [summary["E_ID"] for summary in first["employee_summaries"]] == [1, 2]
+        stored = await db["testUsers"].find_one({"E_ID": 2})
+
+        second = await _sync(csv_row(e_id="1"), csv_row(e_id="2", role="manager"), csv_row(e_id="3"))
+        assert second["unchanged_count"] == 1
+        assert second["updated_employees"] == [{"E_ID": 2, "E_Name": "Asha Rao", "Username": "asha2"}]
+        assert [summary["E_ID"] for summary in second["employee_summaries"]] == [3]
+        assert second["failed_rows"] == []
+
+        updated = await db["testUsers"].find_one({"E_ID": 2})
+        assert updated["role"] == "manager"
+        # Existing employees keep their credentials
+        assert updated["password"] == stored["password"]
+
+    asyncio.run(scenario())
+
+
+def test_e_id_matching_several_employees_is_not_updated(db):
+    async def scenario():
+        await db["testUsers"].insert_many([
+            {"E_ID": 7, "E_Name": "First", "username": "first7", "fingerprint": "a"},
+            {"E_ID": 7, "E_Name": "Second", "username": "second7", "fingerprint": "b"},
+        ])
+        result = await _sync(csv_row(e_id="7"))
+        assert result["failed_rows"] == [{"row": 1, "error": "E_ID 7 matches 2 existing employees"}]
+        assert result["updated_employees"] == [] and result["employee_summaries"] == []
+        assert sorted([doc["E_Name"] async for doc in db["testUsers"].find({"E_ID": 7})]) == ["First", "Second"]
+
+    asyncio.run(scenario())
+
+
+def test_duplicate_e_id_in_file_is_rejected(db):
+    async def scenario():
+        result = await _sync(csv_row(e_id="5"), csv_row(e_id="5", role="manager"))
+        assert [summary["E_ID"] for summary in result["employee_summaries"]] == [5]
+        assert result["failed_rows"] == [{"row": 2, "error": "Duplicate E_ID 5 in file"}]
+
+    asyncio.run(scenario())
+
+
+def test_employee_created_concurrently_is_not_reported_as_new(db):
+    async def scenario():
+        employees = db["testUsers"]
+        bulk_write = employees.bulk_write
+
+        async def another_import_wins(operations, ordered=True):
+            # Inserted between the E_ID lookup and the write
+            await employees.insert_one({"E_ID": 9, "E_Name": "Asha Rao", "username": "asha9", "password": b"theirs"})
+            return await bulk_write(operations, ordered=ordered)
+
+        employees.bulk_write = another_import_wins
+        result = await _sync(csv_row(e_id="9"))
+        assert result["employee_summaries"] == []
+        assert result["updated_employees"] == [{"E_ID": 9, "E_Name": "Asha Rao", "Username": "asha9"}]
+        assert (await employees.find_one({"E_ID": 9}))["password"] == b"theirs"
+
+    asyncio.run(scenario())
@@ -0,0 +1,130 @@
+"""The columnar CSV validator must accept, reject and normalize exactly as EmployeeIn does."""
+import io
+import random
+import pandas as pd
+import pytest
+from pydantic import TypeAdapter, ValidationError, EmailStr
+from schemas import EmployeeIn
+from utils import employee_fingerprint
+from validation import CSV_DTYPES, validate_employee_frame, _fast_emails
+
+HEADER = "E_ID,E_Name,email,address1,address2,role,mobile,altMobile,latitude,longitude,physicalAddress,userStatus"
+
+
+def _row(e_id="1", name="Asha Rao", email="asha@example.com", mobile="9000000000", latitude="12.97", longitude="77.59") -> str:
+    return f"{e_id},{name},{email},1 Main Street,Block 1,field,{mobile},8000000000,{latitude},{longitude},1 Main Street,active"
+
+
+ROWS = [
+    _row(),
+    # Emails a loose pattern accepts but EmailStr rejects
+    _row(email="a..b@example.com"),
+    _row(email=".a@example.com"),
+    _row(email="a@-x.com"),
+    _row(email="a@x..com"),
+    _row(email="a@x_y.com"),
+    _row(email="not-an-email"),
+    _row(email="a@b@example.com"),
+    _row(email=""),
+    # Emails EmailStr accepts after normalizing
+    _row(email="x@EXAMPLE.COM"),
+    _row(email="Mixed.Case@Example.Com"),
+    _row(email=" padded@example.com "),
+    # Other columns
+    _row(name=" "),
+    _row(name=""),
+    _row(e_id="1.5"),
+    _row(e_id="abc"),
+    _row(e_id=""),
+    # Integer text accepted or rejected exactly as int is
+    _row(e_id="1e3"),
+    _row(e_id="1_000"),
+    _row(e_id="1__000"),
+    _row(e_id="+1_000.00"),
+    _row(e_id=" 12 "),
+    _row(e_id="-0"),
+    _row(e_id="0x10"),
+    _row(mobile="9_000_000_000"),
+    # Above 2**53, in a column that also holds bad and missing cells
+    _row(e_id="9007199254740993"),
+    _row(e_id=str(2 ** 63 - 1)),
+    _row(mobile=""),
+    _row(latitude="91"),
+    _row(longitude="-180.5"),
+    _row(latitude="north"),
+    # Bad email on a row that is already invalid for another reason
+    _row(e_id="abc", email="a..b@example.com"),
+]
+
+
+def _frame() -> pd.DataFrame:
+    # Read the same way the upload endpoints read a chunk
+    return pd.read_csv(io.StringIO("\n".join([HEADER] + ROWS)), dtype=CSV_DTYPES)
+
+
+def _model(record: dict):
+    try:
+        return EmployeeIn(**{key: value for key, value in record.items() if not pd.isna(value)})
+    except ValidationError:
+        return None
+
+
+@pytest.mark.parametrize("position", range(len(ROWS)))
+def test_frame_matches_model(position):
+    df = _frame()
+    coerced, valid, errors = validate_employee_frame(df)
+    expected = _model(df.to_dict("records")[position])
+
+    assert bool(valid.iloc[position]) == (expected is not None), errors[position]
+    if expected is not None:
+        record = coerced.to_dict("records")[position]
+        assert record == expected.model_dump()
+        # Sync mode compares fingerprints, so a CSV row and /add-employee must hash the same
+        assert employee_fingerprint(EmployeeIn.model_construct(**record)) == employee_fingerprint(expected)
+    else:
+        assert errors[position]
+
+
+def test_email_is_normalized_like_the_model():
+    coerced, valid, _ = validate_employee_frame(_frame())
+    assert valid.iloc[9]
+    assert coerced["email"].iloc[9] == "x@example.com"
+
+
+def test_all_invalid_chunk():
+    df = pd.read_csv(io.StringIO("\n".join([HEADER, _row(e_id="abc"), _row(latitude="91")])), dtype=CSV_DTYPES)
+    _, valid, errors = validate_employee_frame(df)
+    assert not valid.any()
+    assert all(errors)
+
+
+def _random_address(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return "".join(rng.choice("aZ9.-_+@!'`{~ é") for _ in range(rng.randint(1, 12)))
+    local = "".join(rng.choice("aZ9.+_-!") for _ in range(rng.randint(1, 6)))
+    labels = ["".join(rng.choice("aZ9-_") for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(0, 3))]
+    tld = rng.choice(["com", "COM", "io", "c", "test", "local", "x1", "Onion", "arpa", "a-b"])
+    return f"{local}@{'.'.join(labels + [tld])}"
+
+
+def test_email_fast_path_only_accepts_what_email_str_accepts():
+    rng = random.Random(0)
+    addresses = pd.Series(sorted({_random_address(rng) for _ in range(20000)}) + [
+        "a" * 64 + "@example.com",
+        "a" * 65 + "@example.com",
+        "a@" + "b" * 63 + ".com",
+        "a@xn--abc.com",
+        "a@ab--c.com",
+    ])
+    fast, normalized = _fast_emails(addresses)
+    assert fast.sum() > 100
+    adapter = TypeAdapter(EmailStr)
+    for address, value in zip(addresses[fast], normalized):
+        assert adapter.validate_python(address) == value, address
+
+
+def test_large_ids_are_not_rounded():
+    coerced, valid, _ = validate_employee_frame(_frame())
+    ids = coerced["E_ID"][valid].tolist()
+    assert 9007199254740993 in ids
+    assert 2 ** 63 - 1 in ids
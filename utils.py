@@ -1,6 +1,10 @@
+import json
 import random
+import hashlib
+from datetime import datetime
 import bcrypt
 from bson.binary import Binary
+from schemas import EmployeeIn
 def generate_password_from_name(E_Name: str) -> str:
     """Generate password in format: name_XXX where XXX is random 3 digits."""
     # Extract first name from full name
@@ -11,9 +15,9 @@ def generate_password_from_name(E_Name: str) -> str:
     random_digits = random.randint(100, 999)
     
     return f"{first_name}_{random_digits}"
-def hash_password_bcrypt(password: str) -> bytes:
-    """Hash the password using bcrypt and return the bytes."""
-    salt = bcrypt.gensalt()
+def hash_password_bcrypt(password: str, rounds: int = 12) -> bytes:
+    """Hash the password using bcrypt with the given cost factor and return the bytes."""
+    salt = bcrypt.gensalt(rounds=rounds)
     return bcrypt.hashpw(password.encode('utf-8'), salt)
 
 
@@ -22,9 +26,66 @@ def convert_to_mongodb_binary(hashed_password: bytes) -> Binary:
     return Binary(hashed_password)
 
 
+def normalize_name(E_Name: str) -> str:
+    """Lowercase the name and collapse whitespace, for indexed exact-match lookups."""
+    return " ".join(E_Name.strip().lower().split())
+
+
 def generate_username(E_Name: str, E_ID: int) -> str:
     """Generate a unique username based on employee's name and ID."""
-    E_Name_cleaned = " ".join(E_Name.strip().lower().split())
+    E_Name_cleaned = normalize_name(E_Name)
     name_parts = E_Name_cleaned.split()
     first_name = name_parts[0] if name_parts else "user"
     return f"{first_name}{E_ID}".lower()
+
+
+def employee_fingerprint(emp: EmployeeIn) -> str:
+    """Hash the employee's input fields so unchanged re-imports can be skipped."""
+    payload = json.dumps(emp.model_dump(), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_location(latitude: float, longitude: float) -> dict:
+    """Build the GeoJSON point backing the 2dsphere index (GeoJSON orders longitude first)."""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def build_employee_profile(emp: EmployeeIn) -> dict:
+    """Build the fields derived from the employee's input, refreshed on every sync."""
+    doc = emp.model_dump()
+    doc.update({
+        "E_Name_normalized": normalize_name(emp.E_Name),
+        "location": build_location(emp.latitude, emp.longitude),
+        "fingerprint": employee_fingerprint(emp)
+    })
+    return doc
+
+
+def build_employee_account(username: str, encoded_password: Binary) -> dict:
+    """Build the login and session fields set only when an employee is created."""
+    return {
+        "username": username,
+        "password": encoded_password,
+        "activeTimestamp": datetime.now().strftime("%d/%m/%Y, %I:%M:%S %p"),
+        "currentDeviceID": "",
+        "currentSession": ""
+    }
+
+
+def build_employee_document(emp: EmployeeIn, username: str, encoded_password: Binary) -> dict:
+    """Build the MongoDB document stored for a new employee."""
+    doc = build_employee_profile(emp)
+    doc.update(build_employee_account(username, encoded_password))
+    return doc
+
+
+def build_employee_summary(emp: EmployeeIn, username: str, plain_password: str) -> dict:
+    """Build the summary returned to the caller for a newly created employee."""
+    return {
+        "E_ID": emp.E_ID,
+        "E_Name": emp.E_Name,
+        "email": emp.email,
+        "userStatus": emp.userStatus,
+        "Username": username,
+        "Password": plain_password  # Returns the plain password for user reference
+    }
@@ -0,0 +1,137 @@
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError, EmailStr
+from email_validator import SPECIAL_USE_DOMAIN_NAMES
+from email_validator.rfc_constants import EMAIL_MAX_LENGTH, LOCAL_PART_MAX_LENGTH, DOMAIN_MAX_LENGTH
+
+# Columnar equivalent of the EmployeeIn schema, used for CSV chunks.
+# Single records still go through the Pydantic model.
+INT_COLUMNS = ["E_ID", "mobile", "altMobile"]
+FLOAT_COLUMNS = ["latitude", "longitude"]
+STRING_COLUMNS = ["E_Name", "email", "address1", "address2", "role", "physicalAddress", "userStatus"]
+
+# Read text columns as text so e.g. numeric house numbers are not parsed as ints, and
+# int columns as text so one bad cell cannot turn the column into lossy float64
+CSV_DTYPES = {column: str for column in STRING_COLUMNS + INT_COLUMNS}
+
+# What int accepts from text: optional sign, ASCII digits with single underscores
+# between them and an optional all-zero fraction, e.g. "+1_000.0" but not "1e3"
+INT_PATTERN = r"[+-]?[0-9]+(?:_[0-9]+)*(?:\.0+)?"
+INT64_MAX = str(2 ** 63 - 1)
+
+COORDINATE_RANGES = {"latitude": (-90, 90), "longitude": (-180, 180)}
+
+# The same validator EmployeeIn.email uses, so both paths accept and normalize identically
+_EMAIL_ADAPTER = TypeAdapter(EmailStr)
+
+# A strict ASCII subset of what EmailStr accepts: a dot-atom local part, hostname labels
+# of at most 63 characters with no double hyphens, and an all-letter TLD. EmailStr
+# leaves such addresses as they are apart from lowercasing the domain.
+_EMAIL_ATEXT = r"[A-Za-z0-9_!#$%&'*+\-/=?^`{|}~]"
+EMAIL_FAST_PATTERN = (
+    rf"{_EMAIL_ATEXT}+(?:\.{_EMAIL_ATEXT}+)*"
+    r"@(?:[A-Za-z0-9](?:-?[A-Za-z0-9]){0,31}\.)+[A-Za-z]{2,63}"
+)
+
+
+def _normalize_email(value: str):
+    """Return the address as EmployeeIn would store it, or None if EmailStr rejects it."""
+    try:
+        return _EMAIL_ADAPTER.validate_python(value)
+    except ValidationError:
+        return None
+
+
+def _fast_emails(emails: pd.Series) -> tuple:
+    """Vectorized check for addresses in the strict ASCII subset.
+
+    Returns (mask of addresses the fast path accepted, their normalized values).
+    Addresses outside the mask are not necessarily invalid; they need EmailStr.
+    """
+    parts = emails.str.rpartition("@")
+    local, domain = parts[0], parts[2].str.lower()
+    fast = (
+        emails.str.fullmatch(EMAIL_FAST_PATTERN).fillna(False).astype(bool)
+        & (emails.str.len() <= EMAIL_MAX_LENGTH)
+        & (local.str.len() <= LOCAL_PART_MAX_LENGTH)
+        & (domain.str.len() <= DOMAIN_MAX_LENGTH)
+        & ~domain.str.endswith(tuple("." + name for name in SPECIAL_USE_DOMAIN_NAMES))
+    )
+    return fast, local[fast] + "@" + domain[fast]
+
+
+def _normalize_emails(emails: pd.Series) -> pd.Series:
+    """Normalize a column of addresses as EmailStr would, with None where it rejects them."""
+    if emails.empty:
+        # str.rpartition on an empty column yields no columns to split
+        return emails
+    fast, normalized = _fast_emails(emails)
+    slow = emails[~fast]
+    if slow.empty:
+        return normalized
+    checked = slow.map({value: _normalize_email(value) for value in slow.unique()})
+    return pd.concat([normalized, checked]).reindex(emails.index)
+
+
+def validate_employee_frame(df: pd.DataFrame) -> tuple:
+    """Validate and coerce a DataFrame chunk against the EmployeeIn schema.
+
+    Returns (coerced frame, boolean mask of valid rows, list of error lists per row).
+    """
+    coerced = pd.DataFrame(index=df.index)
+    problems = []  # (column, mask of failing rows, message)
+
+    for column in STRING_COLUMNS:
+        values = df[column]
+        missing = values.isna()
+        problems.append((column, missing, "field required"))
+        coerced[column] = values.where(missing, values.astype(str))
+
+    for column in INT_COLUMNS:
+        missing = df[column].isna()
+        # Parsed from the text, never via float64, which rounds anything above 2**53
+        digits = df[column].astype(str)
+        # Up to 18 plain digits always fits an int64; only the rest need the full rules
+        plain = digits.str.fullmatch(r"[0-9]{1,18}").astype(bool)
+        rest = digits[~missing & ~plain].str.strip()
+        invalid = pd.Series(False, index=df.index)
+        if not rest.empty:
+            rest_digits = rest.str.replace("_", "", regex=False).str.replace(r"\.0+$", "", regex=True)
+            magnitude = rest_digits.str.lstrip("+-").str.lstrip("0")
+            # Small enough for a BSON int64; stricter than EmployeeIn, whose int is unbounded
+            fits = (magnitude.str.len() < len(INT64_MAX)) | ((magnitude.str.len() == len(INT64_MAX)) & (magnitude <= INT64_MAX))
+            invalid[rest.index] = ~(rest.str.fullmatch(INT_PATTERN).astype(bool) & fits)
+            digits[rest.index] = rest_digits
+        problems.append((column, missing, "field required"))
+        problems.append((column, invalid, "value is not a valid integer"))
+        coerced[column] = digits.where(~(missing | invalid), "0").astype("int64")
+
+    for column in FLOAT_COLUMNS:
+        values = pd.to_numeric(df[column], errors="coerce")
+        missing = df[column].isna()
+        invalid = ~missing & values.isna()
+        low, high = COORDINATE_RANGES[column]
+        out_of_range = ~missing & ~invalid & ((values < low) | (values > high))
+        problems.append((column, missing, "field required"))
+        problems.append((column, invalid, "value is not a valid float"))
+        problems.append((column, out_of_range, f"value must be between {low} and {high}"))
+        coerced[column] = values.astype("float64")
+
+    valid = pd.Series(True, index=df.index)
+    for _, failing, _ in problems:
+        valid &= ~failing
+
+    # Only rows that passed everything else; most addresses take the vectorized path
+    candidates = df["email"].notna() & valid
+    normalized = _normalize_emails(coerced.loc[candidates, "email"])
+    bad_email = pd.Series(False, index=df.index)
+    bad_email[normalized.index] = normalized.isna()
+    problems.append(("email", bad_email, "value is not a valid email address"))
+    valid &= ~bad_email
+    coerced.loc[normalized.index, "email"] = normalized
+
+    errors = [[] for _ in range(len(df))]
+    for column, failing, message in problems:
+        for position in failing.to_numpy().nonzero()[0]:
+            errors[position].append(f"{column}: {message}")
+
+    return coerced, valid, errors